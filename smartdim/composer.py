@@ -1,88 +1,96 @@
 from __future__ import annotations
 
 import array
-from typing import Tuple, List
-
-from Quartz import (
-    CGGetActiveDisplayList,
-    CGSetDisplayTransferByTable,
-    CGDisplayRestoreColorSyncSettings,
-)
-
-from smartdim.lut import _remap_slider as _remap_brightness_slider
+import functools
+import queue
+import threading
+import time
+from typing import Tuple, Optional
+
+import numpy as np
+from Foundation import NSOperationQueue
+
+from smartdim.lut import _params_from_slider as _brightness_params_from_slider
+from smartdim.lut import _active_displays as _active_displays
+from smartdim.lut import _new_farray as _new_farray
+from smartdim.lut import _identity as _identity
+from smartdim.lut import _clamp01 as _clamp01
 from smartdim.lut import build_lut_subtractive_guarded as _build_brightness_lut
+from smartdim.lut import _TableCache as _TableCache
+from smartdim.lut import _last_applied as _last_applied
+from smartdim.lut import _push_tables_now as _push_tables_now
+from smartdim.lut import _restore_system_colors as _restore_system_colors
 
 from smartdim.warmth import _remap_slider as _remap_warmth_slider
-from smartdim.warmth import _kelvin_to_gains as _kelvin_to_gains
-from smartdim.warmth import _build_lut_color_tint as _build_warmth_luts
+from smartdim.warmth import _gains_at_mired as _gains_at_mired
 
 LOG = True
 def _log(*a): 
     if LOG: print("[compose]", *a)
 
-def _active_displays(max_count: int = 16) -> List[int]:
-    err, displays, count = CGGetActiveDisplayList(max_count, None, None)
-    if err != 0 or count == 0:
-        _log("CGGetActiveDisplayList err or empty:", err, count)
-        return []
-    return list(displays)[:count]
-
-def restore_colors() -> None:
-    CGDisplayRestoreColorSyncSettings()
+# Composed LUTs keyed on quantized (intensity, warmth, n); slider drags revisit the same steps
+_LUT_CACHE = _TableCache(32)
+
+# Slider drags call apply_combined far faster than the display needs. Requests go
+# into a single slot (a newer one replaces whatever is still waiting); one worker
+# thread builds the LUT off the UI thread (NumPy releases the GIL) and hands the
+# finished tables to the main thread, which pushes them to the displays. The
+# worker then waits _COALESCE_S before taking the next request (last write wins).
+_COALESCE_S = 0.016
+_requests: "queue.Queue[Tuple[int, float, float, int, bool]]" = queue.Queue(maxsize=1)
+_worker: Optional[threading.Thread] = None
+_generation = 0  # bumped by restore_colors so in-flight requests are dropped
+_lock = threading.Lock()  # guards the slot swap, worker start and _generation
+
+def _worker_loop() -> None:
+    while True:
+        gen, intensity, warmth_strength, n, force = _requests.get()
+        # a failed request is logged and dropped; the worker must outlive it, or
+        # every later apply_combined would sit in the slot forever
+        try:
+            key = (round(intensity, 3), round(warmth_strength, 3), n)
+            if (intensity <= 1e-3) and (warmth_strength <= 1e-3):
+                tables = None  # restore
+            else:
+                tables = _combined_tables(key)
+            NSOperationQueue.mainQueue().addOperationWithBlock_(_main_apply(gen, key, tables, force))
+        except Exception as e:
+            _log("Combined LUT request failed:", intensity, warmth_strength, n, repr(e))
+        time.sleep(_COALESCE_S)
+
+def _main_apply(gen: int, key: Tuple[float, float, int], tables: Optional[tuple], force: bool):
+    """Bind one finished build into the block run on the main thread."""
+    def apply() -> None:
+        if gen != _generation:
+            return  # restore_colors ran after this request was queued
+        if tables is None:
+            _restore_now()
+        else:
+            _push_tables(key, tables, force)
+    return apply
+
+def _restore_now() -> None:
+    _restore_system_colors()  # also clears lut's shared last-pushed fingerprint
     _log("Restored original display colors")
 
-def _brightness_params_from_slider(s_user: float):
-    """Reproduce smartdim.lut.set_intensity's parameter mapping, but do not apply."""
-    s_user = 0.0 if s_user < 0.0 else 1.0 if s_user > 1.0 else float(s_user)
+def restore_colors() -> None:
+    """Restore system colors, dropping any queued or in-flight apply."""
+    global _generation
+    with _lock:
+        _generation += 1
+        try:
+            _requests.get_nowait()
+        except queue.Empty:
+            pass
+    _restore_now()
+
+@functools.lru_cache(maxsize=128)  # keyed on the quantized slider value
+def _warmth_params_from_slider(strength: float):
+    """Reproduce smartdim.warmth.set_warmth's mapping to (r_gain, g_gain, b_gain, beta), but do not apply."""
+    s_user = _clamp01(strength)
     if s_user <= 1e-3:
         return None  # Identity
 
-    s = _remap_brightness_slider(s_user)
-
-    splitA = 1.0 / 3.0
-    splitB = 2.0 / 3.0
-    guard_width = 0.050
-
-    if s <= splitA:
-        u = s / splitA
-        guard  = 0.94 - 0.10 * u
-        offset = 0.00 + 0.14 * u
-        beta   = 1.00 - 0.03 * u
-
-    elif s <= splitB:
-        u = (s - splitA) / (splitB - splitA)
-        guard  = 0.84 - 0.24 * u
-        offset = 0.14 + 0.12 * u
-        beta   = 0.97 - 0.07 * u
-
-    else:
-        u = (s - splitB) / (1.0 - splitB)
-        guard  = 0.60 - 0.22 * u
-        offset = 0.26 + 0.18 * u
-        beta_floor = 0.55
-        beta_start = 0.90
-        beta       = beta_start - (beta_start - beta_floor) * (u ** 1.0)
-
-    return guard, guard_width, offset, beta
-
-def _build_brightness_only_lut(intensity: float, n: int) -> Tuple[array.array, array.array, array.array]:
-    params = _brightness_params_from_slider(intensity)
-    if params is None:
-        # Identity LUT
-        xs = [i / (n - 1) for i in range(n)]
-        arr = array.array("f", xs)
-        return arr, arr, arr
-
-    guard, guard_width, offset, beta = params
-    return _build_brightness_lut(n=n, guard=guard, guard_width=guard_width, offset=offset, beta=beta)
-
-def _build_warmth_only_luts(strength: float, n: int) -> Tuple[array.array, array.array, array.array]:
-    s_user = 0.0 if strength < 0.0 else 1.0 if strength > 1.0 else float(strength)
-    if s_user <= 1e-3:
-        xs = [i / (n - 1) for i in range(n)]
-        arr = array.array("f", xs)
-        return arr, arr, arr
-
     s = _remap_warmth_slider(s_user)
     kelvin_min, kelvin_max = 1900.0, 6500.0
     # mired interpolation
@@ -98,55 +106,122 @@ def _build_warmth_only_luts(strength: float, n: int) -> Tuple[array.array, array
         u = (s - 0.4) / 0.6
         beta = 0.98 - 0.08 * (u ** 1.2)
 
-    r_gain, g_gain, b_gain = _kelvin_to_gains(kelvin, preserve_peak=True)
-    return _build_warmth_luts(n, r_gain, g_gain, b_gain, beta=beta)
+    r_gain, g_gain, b_gain = _gains_at_mired(1e6 / kelvin)
+    return r_gain, g_gain, b_gain, beta
 
-def _compose_luts(
-    base_r: array.array, base_g: array.array, base_b: array.array,
-    tint_r: array.array, tint_g: array.array, tint_b: array.array
+def _base_tables(intensity: float, n: int) -> Tuple[array.array, array.array, array.array]:
+    """Brightness stage: lut's cached grey tables for this intensity (identity at 0)."""
+    params = _brightness_params_from_slider(intensity)
+    if params is None:
+        arr = _identity(n)
+        return arr, arr, arr
+    guard, guard_width, offset, beta = params
+    # the same grey tables lut.py builds (and may have prewarmed)
+    return _build_brightness_lut(n, guard, guard_width, offset, beta, None)
+
+@functools.lru_cache(maxsize=128)
+def _shoulder(intensity: float, n: int, rolloff: float) -> np.ndarray:
+    """Soft highlight shoulder (up to 7%) over the brightness output; read-only."""
+    y = np.frombuffer(_base_tables(intensity, n)[0], dtype=np.float32)
+    t = np.clip((y - (1.0 - rolloff)) / rolloff, 0.0, 1.0)
+    shoulder = 1.0 - 0.07 * (t * t * (3.0 - 2.0 * t))
+    shoulder.flags.writeable = False
+    return shoulder
+
+def _build_combined_lut(
+    intensity: float, warmth_strength: float, n: int, rolloff: float = 0.08
 ) -> Tuple[array.array, array.array, array.array]:
     """
-    Compose LUTs as functions: out(x) = Tint(Base(x))
-    Implemented by resampling Tint at Base(x).
+    Evaluate out(x) = Tint(Base(x)) on the x grid: the warmth tint (same math as
+    warmth._build_lut_color_tint) is applied directly to the brightness curve's
+    output, so nothing is resampled. Everything that depends on one axis only is
+    cached: Base(x) is lut's grey table for this intensity, its highlight shoulder
+    is kept per intensity and the tint parameters are memoized per warmth value,
+    so a drag only pays for the per-channel multiply into the output tables.
     """
-    n = len(base_r)
-    def sample(arr: array.array, y: float) -> float:
-        j = int(round(max(0.0, min(1.0, y)) * (n - 1)))
-        return float(arr[j])
-
-    out_r = array.array("f", [0.0]*n)
-    out_g = array.array("f", [0.0]*n)
-    out_b = array.array("f", [0.0]*n)
-
-    for i in range(n):
-        y_r = float(base_r[i])
-        y_g = float(base_g[i])
-        y_b = float(base_b[i])
-        out_r[i] = sample(tint_r, y_r)
-        out_g[i] = sample(tint_g, y_g)
-        out_b[i] = sample(tint_b, y_b)
-
-    return out_r, out_g, out_b
-
-def apply_combined(intensity: float, warmth_strength: float, n: int = 512) -> None:
+    base = _base_tables(intensity, n)
+    tint = _warmth_params_from_slider(warmth_strength)
+    if tint is None:
+        return base
+
+    r_gain, g_gain, b_gain, beta = tint
+    y = np.frombuffer(base[0], dtype=np.float32)  # shared; never written
+    shoulder = _shoulder(intensity, n, rolloff)
+    if beta != 1.0:
+        shoulder = shoulder * beta
+    tables = []
+    for gain in (r_gain, g_gain, b_gain):
+        arr, c = _new_farray(n)  # each channel is computed straight into its table's memory
+        np.multiply(y, gain, out=c)
+        np.minimum(c, 1.0, out=c)
+        c *= shoulder                     # still in 0..1: y, gains and shoulder are all >= 0
+        np.maximum.accumulate(c, out=c)
+        tables.append(arr)
+
+    return tables[0], tables[1], tables[2]
+
+def prewarm(intensity: float = 0.5, warmth_strength: float = 0.5, n: int = 512) -> None:
+    """Run one composed build so its per-axis caches are filled; nothing is applied."""
+    _build_combined_lut(round(intensity, 3), round(warmth_strength, 3), n)
+
+def _combined_tables(key: Tuple[float, float, int]) -> Tuple[array.array, array.array, array.array]:
+    tables = _LUT_CACHE.get(key)
+    if tables is None:
+        tables = _LUT_CACHE.put(key, _build_combined_lut(*key))
+    return tables
+
+def _push_tables(key: Tuple[float, float, int], tables: tuple, force: bool = False) -> None:
+    # identical re-applies are skipped only while these tables are still the last
+    # pushed by any module (lut and warmth write the same gamma tables)
+    displays = _active_displays()
+    fingerprint = (("compose",) + key, tuple(displays))
+    if displays and not force and fingerprint == _last_applied():
+        return
+
+    intensity, warmth_strength, n = key
+    r, g, b = tables
+    if displays:
+        _push_tables_now(displays, r, g, b, fingerprint)
+        if LOG:
+            _log(f"Applied combined LUT: intensity={intensity:.3f}, warmth={warmth_strength:.3f}, n={n}")
+    else:
+        _log("No active displays — combined LUT not applied")
+
+def apply_combined(
+    intensity: float, warmth_strength: float, n: int = 512, force: bool = False
+) -> None:
     """
-    Build brightness + warmth LUTs, compose them, and apply once.
+    Build the composed brightness + warmth LUT and apply once.
     Either control may be 0.0 (treated as identity).
+    Asynchronous: the build runs on the worker thread and the tables are applied
+    from the main run loop (see above), so nothing is applied without a running
+    AppKit main loop; use apply_combined_now there. Re-applying the tables already
+    on screen is skipped unless force=True (e.g. after wake, when the system may
+    have reset the gamma tables).
+    """
+    global _worker
+    with _lock:
+        try:
+            force = force or _requests.get_nowait()[4]
+        except queue.Empty:
+            pass
+        _requests.put_nowait((_generation, intensity, warmth_strength, n, force))
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name="smartdim-compose", daemon=True)
+            _worker.start()
+
+def apply_combined_now(
+    intensity: float, warmth_strength: float, n: int = 512, force: bool = False
+) -> None:
     """
-# restores system colours if both are zero
+    Synchronous apply_combined: build and apply on the calling thread, for callers
+    without an AppKit run loop (scripts, the REPL). Pending asynchronous requests
+    are not dropped; call restore_colors() first if they must not land afterwards.
+    """
+    # restores system colours if both are zero
     if (intensity <= 1e-3) and (warmth_strength <= 1e-3):
-        restore_colors()
+        _restore_now()
         return
 
-    b_r, b_g, b_b = _build_brightness_only_lut(intensity, n)
-    w_r, w_g, w_b = _build_warmth_only_luts(warmth_strength, n)
-    r, g, b = _compose_luts(b_r, b_g, b_b, w_r, w_g, w_b)
-
-    changed = False
-    for d in _active_displays():
-        CGSetDisplayTransferByTable(d, n, r, g, b)
-        changed = True
-    if changed:
-        _log(f"Applied combined LUT: intensity={intensity:.3f}, warmth={warmth_strength:.3f}, n={n}")
-    else:
-        _log("No active displays — combined LUT not applied")
+    key = (round(intensity, 3), round(warmth_strength, 3), n)
+    _push_tables(key, _combined_tables(key), force)
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
 import array
-from typing import Tuple, List, Optional
+import functools
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple, List, Optional
+
+import numpy as np
 from Quartz import (
     CGGetActiveDisplayList,
     CGSetDisplayTransferByTable,
@@ -19,21 +26,20 @@ def _log(*a) -> None:
     if LOG:
         print("[smartdim]", *a)
 
-
 # --------------------------------------------------------------------
-def _monotone_clip(ys: List[float]) -> List[float]:
-    ys = [0.0 if y < 0.0 else 1.0 if y > 1.0 else y for y in ys]
-    for i in range(1, len(ys)):
-        if ys[i] < ys[i - 1]:
-            ys[i] = ys[i - 1]
-    return ys
-
-def _smoothstep(edge0: float, edge1: float, x: float) -> float:
-    """Hermite smoothstep (0→1) between edge0 and edge1."""
-    if x <= edge0: return 0.0
-    if x >= edge1: return 1.0
-    t = (x - edge0) / (edge1 - edge0)
-    return t * t * (3 - 2 * t)
+def _clamp01(v: float) -> float:
+    return 0.0 if v < 0.0 else 1.0 if v > 1.0 else float(v)
+
+def _to_farray(ys: np.ndarray) -> array.array:
+    """Copy a NumPy result into an array.array("f") as raw float32 bytes (no per-element boxing)."""
+    arr = array.array("f")
+    arr.frombytes(np.ascontiguousarray(ys, dtype=np.float32).tobytes())
+    return arr
+
+def _new_farray(n: int) -> Tuple[array.array, np.ndarray]:
+    """A zeroed array.array("f") of length n plus a writable float32 view of the same memory."""
+    arr = array.array("f", (0.0,)) * n
+    return arr, np.frombuffer(arr, dtype=np.float32)
 
 def _remap_slider(s_raw: float) -> float:
     """
@@ -41,7 +47,7 @@ def _remap_slider(s_raw: float) -> float:
     - Gamma-like boost (exp < 1) to increase early response.
     - Mild S-curve to avoid a cliff near the end.
     """
-    s = 0.0 if s_raw < 0.0 else 1.0 if s_raw > 1.0 else float(s_raw)
+    s = _clamp01(s_raw)
 
     # gamma pre-emphasis (lower => punchier early response)
     g = 0.65  #.55..0.75 works best so far ive tested
@@ -50,13 +56,99 @@ def _remap_slider(s_raw: float) -> float:
     # gentle S-curve around the middle
     k = 0.35
     y = 0.5 + (s - 0.5) * (1 + k - k * 4.0 * abs(s - 0.5))
+    return _clamp01(y)
+
+# --------------------------------------------------------------------
+def _subtractive_curve(
+    x: np.ndarray,
+    guard: float,
+    guard_width: float,
+    offset: float,
+    beta: float = 1.0,
+    white_cap: Optional[float] = None,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Guarded subtractive tone curve over float32 samples x in 0..1 (monotone; written to out if given)."""
+    g0 = _clamp01(guard)
+    g1 = max(g0, min(0.999, g0 + max(0.002, guard_width)))
+    off = _clamp01(offset)
+    b = 1.0 if beta is None else _clamp01(beta)
+
+    # Blend (1-w)*x + w*max(0, x-off) == x - w*min(x, off): same curve, two
+    # buffers total (w and y) instead of one temporary per operation.
+    y = np.empty_like(x) if out is None else out
+    if g1 > g0:
+        w = np.subtract(x, g0)
+        w *= 1.0 / (g1 - g0)
+        np.clip(w, 0.0, 1.0, out=w)
+        np.multiply(w, -2.0, out=y)
+        y += 3.0
+        y *= w
+        y *= w                          # Hermite smoothstep 0..1 across the guard band
+    else:
+        np.greater(x, g0, out=y)
+        w = np.empty_like(y)
+    np.minimum(x, off, out=w)           # subtractive (constant-difference above guard, prevents blending but doesnt darken everything at once
+    y *= w
+    np.subtract(x, y, out=y)
+
+#global dim
+    if b != 1.0:
+        y *= b
 
-    # clamp
-    if y < 0.0: y = 0.0
-    if y > 1.0: y = 1.0
+    if white_cap is not None:
+        y[-1] = min(y[-1], white_cap)
+
+    # 0 <= x - w*min(x, off) <= x <= 1 and b is in 0..1, so only monotonicity needs
+    # enforcing (a low white_cap is pulled back up to the running max anyway)
+    np.maximum.accumulate(y, out=y)
     return y
 
-# --------------------------------------------------------------------
+_GRID_CACHE: Dict[int, np.ndarray] = {}
+
+def _grid(n: int) -> np.ndarray:
+    """Sample points linspace(0, 1, n) as float32, built once per n and shared (read-only)."""
+    x = _GRID_CACHE.get(n)
+    if x is None:
+        x = np.linspace(0.0, 1.0, n, dtype=np.float32)
+        x.flags.writeable = False
+        _GRID_CACHE[n] = x
+    return x
+
+_IDENTITY_CACHE: Dict[int, array.array] = {}
+
+def _identity(n: int) -> array.array:
+    """Identity ramp for an n-entry table, built once per n and shared (read-only)."""
+    arr = _IDENTITY_CACHE.get(n)
+    if arr is None:
+        arr = _to_farray(_grid(n))
+        _IDENTITY_CACHE[n] = arr
+    return arr
+
+class _TableCache:
+    """Small LRU of built (r, g, b) tables, for callers whose keys lru_cache can't take directly."""
+
+    def __init__(self, size: int) -> None:
+        self._items: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._size = size
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        hit = self._items.get(key)
+        if hit is not None:
+            self._items.move_to_end(key)
+        return hit
+
+    def put(self, key: tuple, value: tuple) -> tuple:
+        self._items[key] = value
+        if len(self._items) > self._size:
+            self._items.popitem(last=False)
+        return value
+
+# Built tables keyed on the full parameter tuple: slider drags, presets, wake and
+# reconfig re-applies keep asking for the same curves. The returned array.arrays
+# are shared between callers and must be treated as read-only (CoreGraphics only
+# reads them).
+@functools.lru_cache(maxsize=128)  # room for all 101 slider steps + presets
 def build_lut_subtractive_guarded(
     n: int,
     guard: float,          # luminance where dimming starts
@@ -65,47 +157,146 @@ def build_lut_subtractive_guarded(
     beta: float = 1.0,     # global dim multiplier
     white_cap: Optional[float] = WHITE_CAP,
 ) -> Tuple[array.array, array.array, array.array]:
-    g0 = max(0.0, min(1.0, guard))
-    g1 = max(g0, min(0.999, g0 + max(0.002, guard_width)))
-    off = max(0.0, min(1.0, offset))
-    b = 1.0 if beta is None else max(0.0, min(1.0, beta))
-
-    xs = [i / (n - 1) for i in range(n)]
-    ys: List[float] = []
-    for x in xs:
-        y_sub = max(0.0, x - off)   # subtractive (constant-difference above guard, prevents blending but doesnt darken everything at once
-        w = _smoothstep(g0, g1, x)  # 0..1 blend across the guard band
-        y = (1.0 - w) * x + w * y_sub
-        ys.append(y)
-
-#global dim
-    if b != 1.0:
-        ys = [y * b for y in ys]
-
-    if white_cap is not None:
-        ys[-1] = min(ys[-1], white_cap)
-
-    ys = _monotone_clip(ys)
-    arr = array.array("f", ys)
+    if (_clamp01(offset) == 0.0 and (beta is None or _clamp01(beta) == 1.0)
+            and (white_cap is None or white_cap >= 1.0)):
+        arr = _identity(n)  # nothing subtracted or scaled: y == x exactly
+        return arr, arr, arr
+    arr, out = _new_farray(n)  # curve is computed straight into the table's memory
+    _subtractive_curve(_grid(n), guard, guard_width, offset, beta, white_cap, out=out)
     return arr, arr, arr
 
 #--------------------------------------------------------------------
+# Active display ids. While the reconfiguration callback is registered the list is
+# kept until _display_reconfig_callback drops it; without the callback it is only
+# trusted for a short window (the set rarely changes mid-drag).
+_DISPLAY_CACHE: Optional[List[int]] = None
+_DISPLAY_CACHE_AT = 0.0
+_DISPLAY_CACHE_TTL = 0.5  # seconds
+_DISPLAY_LOGGED: Optional[List[int]] = None  # last list logged; only changes are logged
+_CALLBACKS_REGISTERED = False
+
 def _active_displays(max_count: int = 16) -> List[int]:
+    global _DISPLAY_CACHE, _DISPLAY_CACHE_AT, _DISPLAY_LOGGED
+    now = time.monotonic()
+    if _DISPLAY_CACHE is not None and (
+        _CALLBACKS_REGISTERED or now - _DISPLAY_CACHE_AT < _DISPLAY_CACHE_TTL
+    ):
+        return _DISPLAY_CACHE
     err, displays, count = CGGetActiveDisplayList(max_count, None, None)
     if err != 0 or count == 0:
+        _DISPLAY_CACHE = _DISPLAY_LOGGED = None
         _log("CGGetActiveDisplayList err or empty:", err, count)
         return []
-    ids = list(displays)[:count]
-    _log(f"🖥️ Active displays ({count}):", ids)
+    ids = list(displays[:count])
+    _DISPLAY_CACHE, _DISPLAY_CACHE_AT = ids, now
+    if LOG and ids != _DISPLAY_LOGGED:
+        _DISPLAY_LOGGED = ids
+        _log(f"🖥️ Active displays ({count}):", ids)
     return ids
 
+def _forget_display_state() -> None:
+    """Drop the cached display list and last-pushed fingerprint (a reconfig may have reset the tables)."""
+    global _DISPLAY_CACHE, _LAST_APPLIED
+    _DISPLAY_CACHE = None
+    _LAST_APPLIED = None
+
 # helpers
-def _apply_rgb_tables(r: array.array, g: array.array, b: array.array) -> bool:
-    applied = False
-    for d in _active_displays():
-        CGSetDisplayTransferByTable(d, len(r), r, g, b)
-        applied = True
-    return applied
+# The gamma tables are shared by lut, warmth and composer, so what is on screen is
+# tracked here for all of them: (params, display ids) of the last tables any module
+# pushed, params starting with the writer's tag ("guarded", "flat", "warmth",
+# "compose"). Restores and reconfigs clear it. A module skips an identical
+# re-apply (presets, repeated slider values) only while its own entry is current.
+_LAST_APPLIED: Optional[tuple] = None
+
+def _last_applied() -> Optional[tuple]:
+    return _LAST_APPLIED
+
+def _already_applied(params: tuple) -> bool:
+    displays = _active_displays()
+    return bool(displays) and _LAST_APPLIED == (params, tuple(displays))
+
+# The CGSetDisplayTransferByTable calls run on one worker thread so the caller (the
+# AppKit main thread during a drag) only enqueues. The single slot holds the newest
+# (generation, displays, r, g, b); a push still waiting is replaced. _push_lock
+# serializes pushes with restores and with other modules' direct pushes; lut pushes
+# queued before the last of those (older generation) are dropped.
+_pushes: "queue.Queue[tuple]" = queue.Queue(maxsize=1)
+_push_worker: Optional[threading.Thread] = None
+_push_gen = 0
+_slot_lock = threading.Lock()  # guards the slot swap and worker start
+_push_lock = threading.Lock()  # held while tables are pushed or colors restored
+
+def _push_loop() -> None:
+    while True:
+        gen, displays, r, g, b = _pushes.get()
+        length = len(r)
+        with _push_lock:
+            if gen != _push_gen:
+                continue  # a restore or newer direct push ran after this was queued
+            # log and drop a failed push: the worker must outlive it, or every
+            # later push would be queued and never sent
+            try:
+                for d in displays:
+                    CGSetDisplayTransferByTable(d, length, r, g, b)
+            except Exception as e:
+                _forget_display_state()  # unknown what is on screen now; don't skip a retry
+                _log("Table push failed:", displays, repr(e))
+
+def _drop_queued_pushes(fingerprint: Optional[tuple]) -> None:
+    """Invalidate queued/in-flight lut pushes and record what is now on screen (caller holds _push_lock)."""
+    global _push_gen, _LAST_APPLIED
+    with _slot_lock:
+        _push_gen += 1
+        try:
+            _pushes.get_nowait()
+        except queue.Empty:
+            pass
+        _LAST_APPLIED = fingerprint
+
+def _enqueue_push(
+    displays: List[int], r: array.array, g: array.array, b: array.array, fingerprint: Optional[tuple]
+) -> None:
+    global _push_worker, _LAST_APPLIED
+    with _slot_lock:
+        try:
+            _pushes.get_nowait()
+        except queue.Empty:
+            pass
+        _pushes.put_nowait((_push_gen, displays, r, g, b))
+        _LAST_APPLIED = fingerprint
+        if _push_worker is None:
+            _push_worker = threading.Thread(target=_push_loop, name="smartdim-lut", daemon=True)
+            _push_worker.start()
+
+def _apply_rgb_tables(
+    r: array.array, g: array.array, b: array.array, params: Optional[tuple] = None
+) -> str:
+    """
+    Queue the tables for every active display. Returns "queued" (the worker will
+    push them), "skipped" (these tables are already the last pushed) or "none"
+    (no active displays).
+    """
+    displays = _active_displays()
+    if not displays:
+        return "none"
+    fingerprint = None if params is None else (params, tuple(displays))
+    if fingerprint is not None and fingerprint == _LAST_APPLIED:
+        return "skipped"
+    _enqueue_push(displays, r, g, b, fingerprint)
+    return "queued"
+
+def _push_tables_now(
+    displays: List[int], r: array.array, g: array.array, b: array.array, fingerprint: Optional[tuple]
+) -> None:
+    """
+    Push tables on the calling thread (warmth, composer). This write is newer than
+    any lut push still queued, so those are dropped rather than landing on top.
+    """
+    length = len(r)
+    with _push_lock:
+        _drop_queued_pushes(fingerprint)
+        for d in displays:
+            CGSetDisplayTransferByTable(d, length, r, g, b)
 
 def apply_lut_subtractive_guarded(
     guard: float,
@@ -115,11 +306,16 @@ def apply_lut_subtractive_guarded(
     beta: float = 1.0,
     white_cap: Optional[float] = WHITE_CAP,
 ) -> None:
+    params = ("guarded", n, guard, guard_width, offset, beta, white_cap)
+    if _already_applied(params):
+        return
     r, g, b = build_lut_subtractive_guarded(n, guard, guard_width, offset, beta, white_cap)
-    if _apply_rgb_tables(r, g, b):
-        _log(f" Applied subtractive-guarded LUT: guard={guard:.3f}±{guard_width:.3f}, "
-             f"offset={offset:.3f}, beta={beta:.3f}, n={n}")
-    else:
+    status = _apply_rgb_tables(r, g, b, params)
+    if status == "queued":
+        if LOG:
+            _log(f" Queued subtractive-guarded LUT: guard={guard:.3f}±{guard_width:.3f}, "
+                 f"offset={offset:.3f}, beta={beta:.3f}, n={n}")
+    elif status == "none":
         _log(" No active displays — LUT not applied")
 
 # --------------------------------------------------------------------
@@ -134,9 +330,15 @@ def enable_extra_aggressive(): set_intensity(0.85)
 def enable_nuclear(): set_intensity(1.00)
 
 # --------------------------------------------------------------------
+def _restore_system_colors() -> None:
+    """Restore system colors, dropping any queued or in-flight table push (used by every module)."""
+    with _push_lock:
+        _drop_queued_pushes(None)
+        CGDisplayRestoreColorSyncSettings()
+
 def disable() -> None:
     CURRENT["enabled"] = False
-    CGDisplayRestoreColorSyncSettings()
+    _restore_system_colors()
     _log("Disabled (restored original colors)")
 
 def toggle() -> None:
@@ -149,89 +351,122 @@ def reapply_if_enabled(*_args) -> None:
     pass
 
 def _display_reconfig_callback(display, flags, userInfo) -> None:
+    _forget_display_state()
     _log("Display reconfig:", display, flags)
     reapply_if_enabled()
 
 def register_display_callbacks():
+    global _CALLBACKS_REGISTERED
     CGDisplayRegisterReconfigurationCallback(_display_reconfig_callback, None)
+    _CALLBACKS_REGISTERED = True
     _log("Registered display callbacks")
 
 def unregister_display_callbacks():
+    global _CALLBACKS_REGISTERED
     CGDisplayRemoveReconfigurationCallback(_display_reconfig_callback, None)
+    _CALLBACKS_REGISTERED = False
     _log("Unregistered display callbacks")
 
 # --------------------------------------------------------------------
 # Flat LUT for debugging
+@functools.lru_cache(maxsize=16)
+def _flat(level: float, n: int) -> array.array:
+    """Constant table, shared (read-only) like the other cached LUTs."""
+    return _to_farray(np.full(n, level, dtype=np.float32))
+
 def enable_flat(level: float = 0.20, n: int = 256) -> None:
-    level = 0.0 if level < 0.0 else 1.0 if level > 1.0 else level
-    arr = array.array("f", [level] * n)
-    changed = False
-    for d in _active_displays():
-        CGSetDisplayTransferByTable(d, n, arr, arr, arr)
-        changed = True
-    if changed:
-        _log(f" Flat LUT applied at {level:.2f}")
+    level = _clamp01(level)
+    arr = _flat(level, n)
+    status = _apply_rgb_tables(arr, arr, arr, ("flat", level, n))
+    if status == "queued":
+        if LOG:
+            _log(f" Flat LUT queued at {level:.2f}")
         CURRENT.update({"enabled": True, "n": n})
-    else:
+    elif status == "none":
         _log(" No active displays — flat LUT not applied")
 
+# --------------------------------------------------------------------
+def _intensity_params(s):
+    """
+    Map remapped slider value(s) to (guard, guard_width, offset, beta).
+    Branchless over the three phases (np.where), so it takes a scalar or a whole grid.
+    """
+    s = np.asarray(s, dtype=np.float64)
+    # Even thirds: A/B/C each get ~1/3 of travel for steadier feel, splits to prevent blending of similar brightnesses while ensuring not all goes dark at once
+    splitA = 1.0 / 3.0   # ~0.333
+    splitB = 2.0 / 3.0   # ~0.666
+    guard_width = np.full_like(s, 0.050)  # widen slightly for softer band edge
+
+    inA = s <= splitA
+    inB = ~inA & (s <= splitB)
+    u = np.where(inA, s / splitA,                         # 0..1 inside each phase
+        np.where(inB, (s - splitA) / (splitB - splitA),
+                      (s - splitB) / (1.0 - splitB)))
+
+    # ---------- Phase A: whites-first; protect greys ----------
+    #   guard 0.94 -> 0.84, offset 0.00 -> 0.14, beta 1.00 -> 0.97
+    # ---------- Phase B: expand subtractive band ----------
+    #   guard 0.84 -> 0.60, offset 0.14 -> 0.26, beta 0.97 -> 0.90
+    # ---------- Phase C: subtractive + global dim -> nuclear ----------
+    #   guard 0.60 -> 0.38 (pull mids in), offset 0.26 -> 0.44 (heavy subtractive)
+    #   beta continuous at B->C: 0.90 -> 0.55 (endpoint darkness; 0.50 is spicier)
+    guard  = np.where(inA, 0.94 - 0.10 * u, np.where(inB, 0.84 - 0.24 * u, 0.60 - 0.22 * u))
+    offset = np.where(inA, 0.00 + 0.14 * u, np.where(inB, 0.14 + 0.12 * u, 0.26 + 0.18 * u))
+    beta   = np.where(inA, 1.00 - 0.03 * u, np.where(inB, 0.97 - 0.07 * u, 0.90 - 0.35 * u))
+    return guard, guard_width, offset, beta
+
+# The slider -> params mapping precomputed at 1/1000 steps: (1001, 4) rows of
+# (guard, guard_width, offset, beta). Row 0 is never used (slider 0 = identity).
+_PARAM_STEPS = 1000
+_PARAM_TABLE = np.stack(
+    _intensity_params([_remap_slider(i / _PARAM_STEPS) for i in range(_PARAM_STEPS + 1)]),
+    axis=1,
+).astype(np.float32)
+
+def _params_from_slider(s_user: float) -> Optional[Tuple[float, float, float, float]]:
+    """set_intensity's parameter mapping as a table lookup; None means identity."""
+    s_user = _clamp01(s_user)
+    if s_user <= 1e-3:
+        return None
+    # s_user is clamped to 0..1, so truncating s*steps + 0.5 rounds without round()
+    guard, guard_width, offset, beta = _PARAM_TABLE[int(s_user * _PARAM_STEPS + 0.5)].tolist()
+    return guard, guard_width, offset, beta
+
 # --------------------------------------------------------------------
 def set_intensity(intensity: float, n: int = 512) -> None:
     """
     Perceptually-linear slider (to human eyes).
     0.0 -> EXACTLY no effect (restores system colors).
     """
-    s_user = 0.0 if intensity < 0.0 else 1.0 if intensity > 1.0 else float(intensity)
+    s_user = round(_clamp01(intensity), 3)  # cache/table resolution
 
     if s_user <= 1e-3:
-        CGDisplayRestoreColorSyncSettings()
+        _restore_system_colors()
         CURRENT.update({"enabled": False})
         _log("Intensity 0 → restored original colors (no effect)")
         return
 
-    s = _remap_slider(s_user)
+    guard, guard_width, offset, beta = _params_from_slider(s_user)
+    r, g, b = build_lut_subtractive_guarded(n, guard, guard_width, offset, beta, WHITE_CAP)
 
-    # Even thirds: A/B/C each get ~1/3 of travel for steadier feel, splits to prevent blending of similar brightnesses while ensuring not all goes dark at once
-    splitA = 1.0 / 3.0   # ~0.333
-    splitB = 2.0 / 3.0   # ~0.666
-    guard_width = 0.050  # widen slightly for softer band edge
-
-    if s <= splitA:
-        # ---------- Phase A: whites-first; protect greys ----------
-        u = s / splitA  # 0..1 inside phase
-        guard  = 0.94 - 0.10 * u   # 0.94 -> 0.84
-        offset = 0.00 + 0.14 * u   # 0.00 -> 0.14
-        beta   = 1.0 - 0.03 * u    # 1.00 _> 0.97
-
-    elif s <= splitB:
-        # ---------- Phase B: expand subtractive band ----------
-        u = (s - splitA) / (splitB - splitA)  # 0..1
-        guard  = 0.84 - 0.24 * u   # 0.84 -> 0.60
-        offset = 0.14 + 0.12 * u   # 0.14 -> 0.26
-        beta   = 0.97 - 0.07 * u   # 0.97 -> 0.90
-
-    else:
-        # ---------- Phase C: subtractive + global dim -> nuclear ----------
-        u = (s - splitB) / (1.0 - splitB)  # 0..1
-        guard  = 0.60 - 0.22 * u   # 0.60 -> 0.38 (pull mids in)
-        offset = 0.26 + 0.18 * u   # 0.26 -> 0.44 (heavy subtractive)
-
-        # Make beta continuous at B->C:
-        beta_floor = 0.55            # endpoint darkness; 0.50 is spicier
-        beta_start = 0.97 - 0.07*1.0 # = 0.90 (Phase-B end value)
-        beta       = beta_start - (beta_start - beta_floor) * (u ** 1.0)
-        # so: u=0 -> 0.90, u=1 -> 0.55 (no brightening step)
-
-    apply_lut_subtractive_guarded(
-        guard=guard,
-        guard_width=guard_width,
-        offset=offset,
-        n=n,
-        beta=beta,
-        white_cap=WHITE_CAP,
-    )
+    status = _apply_rgb_tables(r, g, b, ("guarded", n, guard, guard_width, offset, beta, WHITE_CAP))
+    if status == "queued":
+        if LOG:
+            _log(f" Queued subtractive-guarded LUT: guard={guard:.3f}±{guard_width:.3f}, "
+                 f"offset={offset:.3f}, beta={beta:.3f}, n={n}")
+    elif status == "none":
+        _log(" No active displays — LUT not applied")
     CURRENT.update({"enabled": True, "beta": beta, "n": n})
-    _log(
-        f"Intensity user={s_user:.3f} → comp={s:.3f} | "
-        f"guard={guard:.3f}±{guard_width:.3f}, offset={offset:.3f}, beta={beta:.3f}"
-    )
+    if LOG:
+        s = _remap_slider(s_user)  # only for the log; the params come from _PARAM_TABLE
+        _log(
+            f"Intensity user={s_user:.3f} → comp={s:.3f} | "
+            f"guard={guard:.3f}±{guard_width:.3f}, offset={offset:.3f}, beta={beta:.3f}"
+        )
+
+def prewarm_intensity_steps(n: int = 512, steps: int = 100) -> None:
+    """Build the tables for every 1/steps slider position up front so drags are cache hits."""
+    for i in range(1, steps + 1):
+        params = _params_from_slider(i / steps)
+        if params is not None:
+            build_lut_subtractive_guarded(n, *params, WHITE_CAP)
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+import threading
+
 from AppKit import (  # type: ignore
     NSApplication, NSApp, NSStatusBar, NSVariableStatusItemLength,
     NSMenu, NSMenuItem, NSWorkspace, NSView, NSSlider, NSTextField,
     NSApplicationActivationPolicyAccessory,
 )
-from Foundation import NSObject  # type: ignore
+from Foundation import NSObject, NSTimer, NSRunLoop, NSRunLoopCommonModes  # type: ignore
+from objc import autorelease_pool  # type: ignore
 
 # Brightness 
 from smartdim.lut import (  # type: ignore
     disable as lut_disable,
+    prewarm_intensity_steps as lut_prewarm,
     register_display_callbacks as lut_register_callbacks,
     reapply_if_enabled as lut_reapply_if_enabled,
     unregister_display_callbacks as lut_unregister_callbacks,
@@ -26,10 +30,43 @@ from smartdim.warmth import (  # type: ignore
 #  Compose to combine warmth + brightness
 from smartdim.composer import (  # type: ignore
     apply_combined as apply_combined_lut_warmth,
+    prewarm as compose_prewarm,
     restore_colors as compose_restore,
 )
 
 ICON_EMOJI = "🌙"
+_PCT_STRINGS = tuple(f"{i}%" for i in range(101))  # slider labels, 0%..100%
+
+# Menu layout, built in one loop. Slider sections: (label, attribute prefix, action);
+# the slider and its value label are stored as self.<prefix>Slider / self.<prefix>ValueLabel.
+_SLIDER_SPEC = (
+    ("Brightness", "lut", "lutSliderChanged:"),
+    ("Warmth", "warmth", "warmthSliderChanged:"),
+)
+# Items below the sliders: (title, action, attribute to keep it under or None); None = separator
+_ITEM_SPEC = (
+    ("Toggle Brightness Off", "toggleBrightnessAction:", "toggle_brightness_item"),
+    ("Toggle Warmth Off", "toggleWarmthAction:", "toggle_warmth_item"),
+    None,
+    ("Quit", "quitAction:", None),
+)
+
+
+def _restore_colors():
+    """Restore system colours; fall back to the per-module restores if composing fails."""
+    try:
+        compose_restore()
+    except Exception:
+        try: lut_disable()
+        except Exception: pass
+        try: warmth_disable()
+        except Exception: pass
+
+
+def _warm_caches():
+    """Fill the LUT caches off the main thread so early slider drags are cache hits (never applies)."""
+    lut_prewarm(n=512)
+    compose_prewarm(n=512)
 
 
 class AppDelegate(NSObject):
@@ -37,46 +74,42 @@ class AppDelegate(NSObject):
         #app state
         self.isMutedLUT = False
         self.isMutedWarmth = False
-        self.lastLUT = 0.0       # brightness strength (0..1)
-        self.lastWarmth = 0.0    # warmth strength (0..1)
+        self.lastLUT = 0.0       # brightness strength (0..1), snapped to 1% steps
+        self.lastWarmth = 0.0    # warmth strength (0..1), snapped to 1% steps
+        self._applyTimer = None  # pending trailing-edge slider apply (NSTimer)
+        self._lastAppliedPair = (None, None)  # effective (intensity, warmth) last sent
 
         # status item
         self.statusItem = NSStatusBar.systemStatusBar().statusItemWithLength_(NSVariableStatusItemLength)
         self.statusItem.setTitle_(ICON_EMOJI)
 
     
+        items = []
+        for label, prefix, action in _SLIDER_SPEC:
+            lbl = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(label, None, "")
+            lbl.setEnabled_(False)
+            items += (lbl, self._slider_item(prefix, action, initial=0.0), NSMenuItem.separatorItem())
+
+        for spec in _ITEM_SPEC:
+            if spec is None:
+                items.append(NSMenuItem.separatorItem())
+                continue
+            title, action, attr = spec
+            item = self._make_item(title, action)
+            if attr is not None:
+                setattr(self, attr, item)
+            items.append(item)
+
+        # enabled state is set explicitly above, so skip AppKit's per-insert validation
         menu = NSMenu.alloc().init()
-
-        # LUT
-        lbl_b = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_("Brightness", None, "")
-        lbl_b.setEnabled_(False)
-        menu.addItem_(lbl_b)
-        menu.addItem_(self._slider_item_lut(initial=self.lastLUT))
-
-        menu.addItem_(NSMenuItem.separatorItem())
-
-        # Warmth 
-        lbl_w = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_("Warmth", None, "")
-        lbl_w.setEnabled_(False)
-        menu.addItem_(lbl_w)
-        menu.addItem_(self._slider_item_warmth(initial=self.lastWarmth))
-
-        menu.addItem_(NSMenuItem.separatorItem())
-
-        # Toggles
-        self.toggle_brightness_item = self._make_item("Toggle Brightness Off", "toggleBrightnessAction:")
-        menu.addItem_(self.toggle_brightness_item)
-
-        self.toggle_warmth_item = self._make_item("Toggle Warmth Off", "toggleWarmthAction:")
-        menu.addItem_(self.toggle_warmth_item)
-
-        menu.addItem_(NSMenuItem.separatorItem())
-        menu.addItem_(self._make_item("Quit", "quitAction:"))
-
+        menu.setAutoenablesItems_(False)
+        for item in items:
+            menu.addItem_(item)
         self.statusItem.setMenu_(menu)
 
         # Init titles
         self._install_notifications()
+        threading.Thread(target=_warm_caches, name="smartdim-prewarm", daemon=True).start()
         lut_register_callbacks()
         warmth_register_callbacks()
 
@@ -87,35 +120,9 @@ class AppDelegate(NSObject):
 
     def _format_percent(self, value: float) -> str:
         """Show slider value as percentage with '%' suffix."""
-        return f"{int(round(value * 100))}%"
-
-    def _slider_item_lut(self, initial: float = 0.0) -> NSMenuItem:
-        container = NSView.alloc().initWithFrame_(((0, 0), (240, 44)))
-
-        slider = NSSlider.alloc().initWithFrame_(((8, 8), (180, 20)))
-        slider.setMinValue_(0.0)
-        slider.setMaxValue_(1.0)
-        slider.setFloatValue_(float(initial))
-        slider.setContinuous_(True)
-        slider.setTarget_(self)
-        slider.setAction_("lutSliderChanged:")
-        container.addSubview_(slider)
-        self.lutSlider = slider
+        return _PCT_STRINGS[max(0, min(100, int(value * 100 + 0.5)))]
 
-        value_label = NSTextField.alloc().initWithFrame_(((192, 8), (40, 20)))
-        value_label.setEditable_(False)
-        value_label.setBordered_(False)
-        value_label.setDrawsBackground_(False)
-        value_label.setAlignment_(1)
-        value_label.setStringValue_(self._format_percent(initial))
-        container.addSubview_(value_label)
-        self.lutValueLabel = value_label
-
-        mi = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_("", None, "")
-        mi.setView_(container)
-        return mi
-
-    def _slider_item_warmth(self, initial: float = 0.0) -> NSMenuItem:
+    def _slider_item(self, prefix: str, action: str, initial: float = 0.0) -> NSMenuItem:
         container = NSView.alloc().initWithFrame_(((0, 0), (240, 44)))
 
         slider = NSSlider.alloc().initWithFrame_(((8, 8), (180, 20)))
@@ -124,9 +131,9 @@ class AppDelegate(NSObject):
         slider.setFloatValue_(float(initial))
         slider.setContinuous_(True)
         slider.setTarget_(self)
-        slider.setAction_("warmthSliderChanged:")
+        slider.setAction_(action)
         container.addSubview_(slider)
-        self.warmthSlider = slider
+        setattr(self, prefix + "Slider", slider)
 
         value_label = NSTextField.alloc().initWithFrame_(((192, 8), (40, 20)))
         value_label.setEditable_(False)
@@ -135,7 +142,7 @@ class AppDelegate(NSObject):
         value_label.setAlignment_(1)
         value_label.setStringValue_(self._format_percent(initial))
         container.addSubview_(value_label)
-        self.warmthValueLabel = value_label
+        setattr(self, prefix + "ValueLabel", value_label)
 
         mi = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_("", None, "")
         mi.setView_(container)
@@ -145,74 +152,97 @@ class AppDelegate(NSObject):
         self.toggle_brightness_item.setTitle_("Toggle Brightness On" if self.isMutedLUT else "Toggle Brightness Off")
         self.toggle_warmth_item.setTitle_("Toggle Warmth On" if self.isMutedWarmth else "Toggle Warmth Off")
 
-    def _apply_current(self):
+    def _effective_pair(self):
+        """(intensity, warmth) after muting, rounded the way _lastAppliedPair stores it."""
+        intensity = 0.0 if self.isMutedLUT else self.lastLUT
+        warmth    = 0.0 if self.isMutedWarmth else self.lastWarmth
+        return round(intensity, 4), round(warmth, 4)
+
+    def _apply_current(self, force: bool = False, update_labels: bool = True):
         """Compose current Brightness + Warmth into a single LUT and apply once."""
-        intensity = 0.0 if self.isMutedLUT else float(self.lutSlider.floatValue())
-        warmth    = 0.0 if self.isMutedWarmth else float(self.warmthSlider.floatValue())
+        intensity, warmth = self._effective_pair()
 
+        # slider actions set their own label as the value changes
+        if update_labels:
+            self.lutValueLabel.setStringValue_(self._format_percent(self.lastLUT))
+            self.warmthValueLabel.setStringValue_(self._format_percent(self.lastWarmth))
 
-        self.lutValueLabel.setStringValue_(self._format_percent(float(self.lutSlider.floatValue())))
-        self.warmthValueLabel.setStringValue_(self._format_percent(float(self.warmthSlider.floatValue())))
+        # nothing to do if the effective pair is what we last sent, unless the
+        # hardware tables may have been reset (wake)
+        if (intensity, warmth) == self._lastAppliedPair and not force:
+            return
+        self._lastAppliedPair = (intensity, warmth)
 
         if intensity <= 0.001 and warmth <= 0.001:
             compose_restore()
         else:
-            apply_combined_lut_warmth(intensity, warmth, n=512)
+            apply_combined_lut_warmth(intensity, warmth, n=512, force=force)
+
+    def _schedule_apply(self):
+        """Trailing-edge debounce: apply once the slider has been still for ~16 ms."""
+        if self._applyTimer is not None:
+            self._applyTimer.invalidate()
+        self._applyTimer = NSTimer.timerWithTimeInterval_target_selector_userInfo_repeats_(
+            0.016, self, "applyFireNotif:", None, False
+        )
+        # common modes: while the status menu is open (i.e. during every slider drag)
+        # the run loop is in event-tracking mode, where a default-mode timer never fires
+        NSRunLoop.currentRunLoop().addTimer_forMode_(self._applyTimer, NSRunLoopCommonModes)
+
+    def applyFireNotif_(self, _):
+        self._applyTimer = None
+        self._apply_current(update_labels=False)
 
    #ACTIONS
    #brightness
     def lutSliderChanged_(self, sender):
-        val = float(sender.floatValue())
+        # continuous slider fires per pixel; only whole-percent changes rebuild/apply
+        val = round(sender.floatValue() * 100) / 100.0
+        if val == self.lastLUT:
+            return
         self.lastLUT = val
         self.lutValueLabel.setStringValue_(self._format_percent(val))
-        self._apply_current()
+        self._schedule_apply()
 
     def toggleBrightnessAction_(self, _):
         self.isMutedLUT = not self.isMutedLUT
         self._update_toggle_titles()
-        self._apply_current()
+        # labels show the slider values, which muting doesn't change; _apply_current
+        # skips the apply when the effective pair is unchanged (e.g. muting a 0% slider)
+        self._apply_current(update_labels=False)
 
     #warmth
     def warmthSliderChanged_(self, sender):
-        val = float(sender.floatValue())
+        # continuous slider fires per pixel; only whole-percent changes rebuild/apply
+        val = round(sender.floatValue() * 100) / 100.0
+        if val == self.lastWarmth:
+            return
         self.lastWarmth = val
         self.warmthValueLabel.setStringValue_(self._format_percent(val))
-        self._apply_current()
+        self._schedule_apply()
 
     def toggleWarmthAction_(self, _):
         self.isMutedWarmth = not self.isMutedWarmth
         self._update_toggle_titles()
-        self._apply_current()
+        # labels show the slider values, which muting doesn't change; _apply_current
+        # skips the apply when the effective pair is unchanged (e.g. muting a 0% slider)
+        self._apply_current(update_labels=False)
 
     #quit
     def quitAction_(self, _):
-        # restore colours
-        try:
-            compose_restore()
-        except Exception:
-            try: lut_disable()
-            except Exception: pass
-            try: warmth_disable()
-            except Exception: pass
-
-        try:
-            lut_unregister_callbacks()
-        except Exception:
-            pass
-        try:
-            warmth_unregister_callbacks()
-        except Exception:
-            pass
-
-        try:
-            NSWorkspace.sharedWorkspace().notificationCenter().removeObserver_(self)
-        except Exception:
-            pass
-
-        try:
-            NSStatusBar.systemStatusBar().removeStatusItem_(self.statusItem)
-        except Exception:
-            pass
+        # teardown steps are independent: a failing one must not stop the rest
+        with autorelease_pool():
+            for step in (
+                _restore_colors,
+                lut_unregister_callbacks,
+                warmth_unregister_callbacks,
+                lambda: NSWorkspace.sharedWorkspace().notificationCenter().removeObserver_(self),
+                lambda: NSStatusBar.systemStatusBar().removeStatusItem_(self.statusItem),
+            ):
+                try:
+                    step()
+                except Exception:
+                    pass
 
         NSApp.terminate_(self)
 
@@ -224,7 +254,7 @@ class AppDelegate(NSObject):
         )
 
     def reapplyNotif_(self, _):
-        self._apply_current()
+        self._apply_current(force=True)
 
 
 def main():
@@ -1,103 +1,162 @@
 from __future__ import annotations
+import functools
 from typing import Dict
 from AppKit import (
     NSApp, NSScreen, NSPanel,
     NSBorderlessWindowMask, NSApplication,
-    NSBackingStoreBuffered, NSColor, NSView,
-    NSNotificationCenter, NSBezierPath,
+    NSBackingStoreBuffered, NSColor,
+    NSNotificationCenter,
     NSScreenSaverWindowLevel,
     NSWindowCollectionBehaviorCanJoinAllSpaces,
     NSWindowCollectionBehaviorFullScreenAuxiliary,
     NSWindowCollectionBehaviorStationary,
 )
 from Foundation import NSObject
+from Quartz import (
+    CGDisplayRegisterReconfigurationCallback,
+    CGDisplayRemoveReconfigurationCallback,
+    kCGDisplayAddFlag,
+    kCGDisplayRemoveFlag,
+    kCGDisplayMovedFlag,
+    kCGDisplaySetMainFlag,
+    kCGDisplaySetModeFlag,
+    kCGDisplayDesktopShapeChangedFlag,
+)
 
-# overlay dim view
-class _DimView(NSView):
-    def initWithAlpha_(self, a: float):
-        self = super().initWithFrame_(((0, 0), (10, 10)))
-        if self is None:
-            return None
-        self._alpha = max(0.0, min(1.0, a))
-        return self
+# overlay dim color
+_ALPHA_STEPS = 512  # alpha changes smaller than 1/512 are not worth an update
+
+@functools.lru_cache(maxsize=None)  # at most _ALPHA_STEPS + 1 colors
+def _dim_color(q: int):
+    """
+    Color for alpha step q (a = q / _ALPHA_STEPS), equivalent to the dark layer
+    (black at a) with the faint white lift (white at 0.15*a) drawn over it:
+    alpha A = a1 + a2 - a1*a2, grey = a2 / A.
+    """
+    a = q / _ALPHA_STEPS
+    a2 = a * 0.15
+    a_out = a + a2 - a * a2
+    grey = a2 / a_out if a_out > 0.0 else 0.0
+    return NSColor.colorWithCalibratedWhite_alpha_(grey, a_out)
 
-    def setAlpha_(self, a: float):
-        self._alpha = max(0.0, min(1.0, a))
-        self.setNeedsDisplay_(True)
-
-    def drawRect_(self, rect):
-        # Draw dark layer to dim highlights
-        path = NSBezierPath.bezierPathWithRect_(rect)
-        NSColor.colorWithCalibratedWhite_alpha_(0.0, self._alpha).set()
-        path.fill()
-        # Add faint white layer to lift shadows, prevent darkenening blacks too mcuh
-        lift_alpha = self._alpha * 0.15
-        if lift_alpha > 0.0:
-            NSColor.colorWithCalibratedWhite_alpha_(1.0, lift_alpha).set()
-            path.fill()
+def _alpha_step(a: float) -> int:
+    return int(a * _ALPHA_STEPS + 0.5)
 
 # Manager
 
+# Reconfigurations that can change which screens exist or where they are (a new
+# main display or an arrangement change moves the Cocoa screen frames too); the
+# rest (begin-configuration, mirroring, ...) leaves the panels valid.
+_RECONFIG_FLAGS = (
+    kCGDisplayAddFlag | kCGDisplayRemoveFlag | kCGDisplayMovedFlag | kCGDisplaySetMainFlag
+    | kCGDisplaySetModeFlag | kCGDisplayDesktopShapeChangedFlag
+)
+
+def _overlay_reconfig_callback(display, flags, manager) -> None:
+    # Only marks the panels stale: the callback fires once per display and can run
+    # before AppKit has refreshed NSScreen, so the rebuild waits for AppKit's
+    # screen-parameters notification (screensChanged_).
+    if flags & _RECONFIG_FLAGS:
+        manager._needsRebuild = True
+
 class DimOverlayManager(NSObject):
     def init(self):
         self = super().init()
         if self is None:
             return None
-        self.windows: Dict[str, NSPanel] = {}
+        self.windows: Dict[int, NSPanel] = {}  # keyed by CGDirectDisplayID
         self.alpha: float = 0.0
-        center = NSNotificationCenter.defaultCenter()
-        center.addObserver_selector_name_object_(
-            self,
-            "screensChanged:",
-            "NSApplicationDidChangeScreenParametersNotification",
-            None,
-        )
+        self._observing = False     # notification + reconfig callback registered; only while enabled
+        self._needsRebuild = False  # set by the reconfig callback, consumed by screensChanged_
         return self
 
+    def dealloc(self):
+        self._stop_observing()
+        super().dealloc()
+
     #  API
     def enable_(self, alpha: float = 0.35):
         self.alpha = max(0.0, min(1.0, alpha))
+        self._start_observing()
         self._build_all()
 
     def setAlpha_(self, alpha: float):
-        self.alpha = max(0.0, min(1.0, alpha))
+        alpha = max(0.0, min(1.0, alpha))
+        if abs(alpha - self.alpha) < 1.0 / _ALPHA_STEPS:
+            return
+        self.alpha = alpha
+        color = _dim_color(_alpha_step(alpha))
         for w in self.windows.values():
-            view = w.contentView()
-            if hasattr(view, "setAlpha_"):
-                view.setAlpha_(self.alpha)
+            w.setBackgroundColor_(color)
 
     def disable(self):
+        self._stop_observing()
         for w in self.windows.values():
             w.orderOut_(None)
         self.windows.clear()
         self.alpha = 0.0
 
     # Notifications
+    def _start_observing(self):
+        if not self._observing:
+            NSNotificationCenter.defaultCenter().addObserver_selector_name_object_(
+                self,
+                "screensChanged:",
+                "NSApplicationDidChangeScreenParametersNotification",
+                None,
+            )
+            CGDisplayRegisterReconfigurationCallback(_overlay_reconfig_callback, self)
+            self._observing = True
+
+    def _stop_observing(self):
+        # a stale manager left registered would rebuild panels on every reconfig
+        if self._observing:
+            NSNotificationCenter.defaultCenter().removeObserver_(self)
+            CGDisplayRemoveReconfigurationCallback(_overlay_reconfig_callback, self)
+            self._observing = False
+
     def screensChanged_(self, _note):
-        if self.alpha > 0:
+        # NSScreen is current by now; skip notifications no relevant reconfig preceded
+        if self.alpha > 0 and self._needsRebuild:
             self._build_all()
 
     # overlay windows
     def _build_all(self):
-        self.disable()
+        """Bring the panels in line with the current screens: add new, resize moved, drop gone."""
+        self._needsRebuild = False
+        seen = set()
         for screen in NSScreen.screens():
+            did = int(screen.deviceDescription()["NSScreenNumber"])
+            seen.add(did)
             frame = screen.frame()
-            panel = NSPanel.alloc().initWithContentRect_styleMask_backing_defer_(
-                frame, NSBorderlessWindowMask, NSBackingStoreBuffered, False
-            )
-            panel.setLevel_(NSScreenSaverWindowLevel)
-            panel.setOpaque_(False)
-            panel.setBackgroundColor_(NSColor.clearColor())
-            panel.setIgnoresMouseEvents_(True)
-            panel.setCollectionBehavior_(
-                NSWindowCollectionBehaviorCanJoinAllSpaces
-                | NSWindowCollectionBehaviorFullScreenAuxiliary
-                | NSWindowCollectionBehaviorStationary
-            )
-            view = _DimView.alloc().initWithAlpha_(self.alpha)
-            panel.setContentView_(view)
-            panel.orderFrontRegardless()
-            self.windows[str(id(panel))] = panel
+            panel = self.windows.get(did)
+            if panel is None:
+                self.windows[did] = self._make_panel(frame)
+                continue
+            if panel.frame() != frame:
+                panel.setFrame_display_(frame, False)
+            panel.setBackgroundColor_(_dim_color(_alpha_step(self.alpha)))
+        for did in [d for d in self.windows if d not in seen]:
+            self.windows.pop(did).orderOut_(None)
+
+    def _make_panel(self, frame) -> NSPanel:
+        panel = NSPanel.alloc().initWithContentRect_styleMask_backing_defer_(
+            frame, NSBorderlessWindowMask, NSBackingStoreBuffered, False
+        )
+        panel.setLevel_(NSScreenSaverWindowLevel)
+        # The dim is the panel's own background color (no custom view or drawing);
+        # a layer-backed content view lets Core Animation composite it
+        panel.setOpaque_(False)
+        panel.setBackgroundColor_(_dim_color(_alpha_step(self.alpha)))
+        panel.setIgnoresMouseEvents_(True)
+        panel.setCollectionBehavior_(
+            NSWindowCollectionBehaviorCanJoinAllSpaces
+            | NSWindowCollectionBehaviorFullScreenAuxiliary
+            | NSWindowCollectionBehaviorStationary
+        )
+        panel.contentView().setWantsLayer_(True)
+        panel.orderFrontRegardless()
+        return panel
 #--------------------------------------------------------------------
 
 _manager: DimOverlayManager | None = None
@@ -116,3 +175,4 @@ def disable_overlay():
     global _manager
     if _manager is not None:
         _manager.disable()
+        _manager = None
@@ -3,15 +3,26 @@ from __future__ import annotations
 
 import math
 import array
-from typing import List, Tuple, Optional
+import queue
+import threading
+import time
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
 from Quartz import (
-    CGGetActiveDisplayList,
-    CGSetDisplayTransferByTable,
-    CGDisplayRestoreColorSyncSettings,
     CGDisplayRegisterReconfigurationCallback,
     CGDisplayRemoveReconfigurationCallback,
 )
 
+from smartdim.lut import _new_farray as _new_farray
+from smartdim.lut import _grid as _grid
+from smartdim.lut import _active_displays as _active_displays
+from smartdim.lut import _forget_display_state as _forget_display_state
+from smartdim.lut import _last_applied as _last_applied
+from smartdim.lut import _push_tables_now as _push_tables_now
+from smartdim.lut import _restore_system_colors as _restore_system_colors
+from smartdim.lut import _TableCache as _TableCache
+
 # --------------------------------------------------------------------
 # Module state
 # --------------------------------------------------------------------
@@ -28,55 +39,68 @@ def _log(*a) -> None:
         print("[warmth]", *a)
 
 # --------------------------------------------------------------------
-# Display enumeration helpers
+# Display helpers (the active display list, pushes and restores go through lut,
+# which tracks the last tables pushed by any module)
 # --------------------------------------------------------------------
-def _active_displays(max_count: int = 16) -> List[int]:
-    err, displays, count = CGGetActiveDisplayList(max_count, None, None)
-    if err != 0 or count == 0:
-        _log("CGGetActiveDisplayList err or empty:", err, count)
-        return []
-    return list(displays)[:count]
-
-def _apply_rgb_tables(r: array.array, g: array.array, b: array.array) -> bool:
-    changed = False
-    for d in _active_displays():
-        CGSetDisplayTransferByTable(d, len(r), r, g, b)
-        changed = True
-    return changed
+def _apply_rgb_tables(
+    r: array.array, g: array.array, b: array.array, kelvin: float, beta: float, n: int
+) -> bool:
+    displays = _active_displays()
+    if displays:
+        _push_tables_now(displays, r, g, b, (("warmth", kelvin, beta, n), tuple(displays)))
+    return bool(displays)
 
 # --------------------------------------------------------------------
 # Math utilities
 # --------------------------------------------------------------------
-def _monotone_clip(xs: List[float]) -> List[float]:
-    xs = [0.0 if v < 0.0 else 1.0 if v > 1.0 else v for v in xs]
-    for i in range(1, len(xs)):
-        if xs[i] < xs[i-1]:
-            xs[i] = xs[i-1]
-    return xs
-
-def _smoothstep(a: float, b: float, x: float) -> float:
-    if x <= a: return 0.0
-    if x >= b: return 1.0
-    t = (x - a) / (b - a)
-    return t * t * (3 - 2 * t)
+def _monotone_clip(ys: np.ndarray) -> np.ndarray:
+    """Clamp to [0,1] and enforce non-decreasing, in place."""
+    np.clip(ys, 0.0, 1.0, out=ys)
+    np.maximum.accumulate(ys, out=ys)
+    return ys
 
-def _remap_slider(s_raw: float) -> float:
-    """Perceptual remap so the slider feels even."""
-    s = 0.0 if s_raw < 0.0 else 1.0 if s_raw > 1.0 else float(s_raw)
+_SHOULDER_CACHE: Dict[Tuple[int, float], np.ndarray] = {}
+
+def _shoulder(n: int, rolloff: float) -> np.ndarray:
+    """Highlight shoulder on the x grid (pulls the top by up to 7%), built once per (n, rolloff); read-only."""
+    key = (n, rolloff)
+    shoulder = _SHOULDER_CACHE.get(key)
+    if shoulder is None:
+        t = np.clip((_grid(n) - (1.0 - rolloff)) / rolloff, 0.0, 1.0)
+        shoulder = 1.0 - 0.07 * (t * t * (3.0 - 2.0 * t))
+        shoulder.flags.writeable = False
+        _SHOULDER_CACHE[key] = shoulder
+    return shoulder
+
+def _remap_slider_ref(s_raw):
+    """Perceptual remap so the slider feels even (reference math, tabulated below; scalar or array)."""
+    s = np.clip(s_raw, 0.0, 1.0)
     # Gamma-ish pre-emphasis for early response
     s = s ** 0.75
     # Gentle S curve around mid
     k = 0.35
-    s = 0.5 + (s - 0.5) * (1 + k - k * 4.0 * abs(s - 0.5))
-    return 0.0 if s < 0 else 1.0 if s > 1 else s
+    s = 0.5 + (s - 0.5) * (1 + k - k * 4.0 * np.abs(s - 0.5))
+    return np.clip(s, 0.0, 1.0)
+
+# Slider resolution is limited, so the remap is a 1024-entry table, linearly
+# interpolated on the hot path (a plain list: scalar reads need no NumPy boxing)
+_REMAP_SIZE = 1024
+_REMAP_LUT: List[float] = _remap_slider_ref(np.arange(_REMAP_SIZE) / (_REMAP_SIZE - 1)).tolist()
+
+def _remap_slider(s_raw: float) -> float:
+    """Perceptual remap so the slider feels even."""
+    f = max(0.0, min(1.0, s_raw)) * (_REMAP_SIZE - 1)
+    i = min(int(f), _REMAP_SIZE - 2)
+    a = f - i
+    return _REMAP_LUT[i] + (_REMAP_LUT[i + 1] - _REMAP_LUT[i]) * a
 
 # --------------------------------------------------------------------
 # Kelvin ↔︎ RGB (approximate blackbody; sRGB-ish)
 # Based on common temperature → RGB approximations (Tanner Helland/ImgTec-style),
 # adapted to produce [0..1] channel gains.
 # --------------------------------------------------------------------
-def _kelvin_to_rgb_channels(k: float) -> Tuple[float, float, float]:
-    """Return (R,G,B) in 0..1 for a given white point in Kelvin."""
+def _kelvin_to_rgb_channels_exact(k: float) -> Tuple[float, float, float]:
+    """Return (R,G,B) in 0..1 for a given white point in Kelvin (reference fit)."""
     k = max(1000.0, min(40000.0, k)) / 100.0
     # Red
     if k <= 66:
@@ -100,12 +124,33 @@ def _kelvin_to_rgb_channels(k: float) -> Tuple[float, float, float]:
         b = max(0.0, min(255.0, b))
     return (r/255.0, g/255.0, b/255.0)
 
+# The app only asks for 1000..6500 K, where the fit is continuous (it jumps at 6600 K),
+# so that range is tabulated every 25 K and linearly interpolated (< 0.25% off the
+# exact fit); anything outside falls back to the exact math.
+_BB_K0, _BB_K1, _BB_STEP = 1000.0, 6500.0, 25.0
+_BB_RGB: List[Tuple[float, float, float]] = [
+    _kelvin_to_rgb_channels_exact(_BB_K0 + i * _BB_STEP)
+    for i in range(int((_BB_K1 - _BB_K0) / _BB_STEP) + 1)
+]
+
+def _kelvin_to_rgb_channels(k: float) -> Tuple[float, float, float]:
+    """Return (R,G,B) in 0..1 for a given white point in Kelvin."""
+    if not (_BB_K0 <= k <= _BB_K1):
+        return _kelvin_to_rgb_channels_exact(k)
+    f = (k - _BB_K0) / _BB_STEP
+    i = min(int(f), len(_BB_RGB) - 2)
+    a = f - i
+    (r0, g0, b0), (r1, g1, b1) = _BB_RGB[i], _BB_RGB[i + 1]
+    return (r0 + (r1 - r0) * a, g0 + (g1 - g0) * a, b0 + (b1 - b0) * a)
+
+_REF_D65 = _kelvin_to_rgb_channels_exact(6500.0)  # reference white, constant
+
 def _kelvin_to_gains(k: float, preserve_peak: bool = True) -> Tuple[float, float, float]:
     """
     Convert target Kelvin to per-channel gains relative to D65 (~6500K).
     If preserve_peak=True, normalize so the maximum gain is 1.0 to avoid highlight clipping.
     """
-    ref = _kelvin_to_rgb_channels(6500.0)
+    ref = _REF_D65
     tgt = _kelvin_to_rgb_channels(k)
 
     # Gains to move D65 white → target white
@@ -119,6 +164,26 @@ def _kelvin_to_gains(k: float, preserve_peak: bool = True) -> Tuple[float, float
             gains = (gains[0]/m, gains[1]/m, gains[2]/m)
     return gains
 
+# Peak-preserving gains are close to linear in mireds across the slider's range
+# (6500 K .. 1900 K), so they are precomputed at 64 evenly spaced mireds and linearly
+# interpolated (< 3e-4 off) instead of going through Kelvin and the blackbody fit.
+_MIRED_LO, _MIRED_HI = 1e6 / 6500.0, 1e6 / 1900.0
+_MIRED_STEPS = 63
+_MIRED_GAINS: List[Tuple[float, float, float]] = [
+    _kelvin_to_gains(1e6 / (_MIRED_LO + (_MIRED_HI - _MIRED_LO) * i / _MIRED_STEPS), preserve_peak=True)
+    for i in range(_MIRED_STEPS + 1)
+]
+
+def _gains_at_mired(m: float) -> Tuple[float, float, float]:
+    """Peak-preserving gains for a white point given in mireds (1e6 / Kelvin)."""
+    if not (_MIRED_LO <= m <= _MIRED_HI):
+        return _kelvin_to_gains(1e6 / m, preserve_peak=True)
+    f = (m - _MIRED_LO) / (_MIRED_HI - _MIRED_LO) * _MIRED_STEPS
+    i = min(int(f), _MIRED_STEPS - 1)
+    a = f - i
+    (r0, g0, b0), (r1, g1, b1) = _MIRED_GAINS[i], _MIRED_GAINS[i + 1]
+    return (r0 + (r1 - r0) * a, g0 + (g1 - g0) * a, b0 + (b1 - b0) * a)
+
 # --------------------------------------------------------------------
 # LUT builder: apply per-channel gain, optionally mild global dim (beta)
 # --------------------------------------------------------------------
@@ -134,34 +199,75 @@ def _build_lut_color_tint(
     Build three 1D LUTs with per-channel gains and a highlight-rolloff to
     avoid harsh clipping when a gain > 1 (rare if preserve_peak=True).
     """
-    xs = [i / (n - 1) for i in range(n)]
-    rr: List[float] = []
-    gg: List[float] = []
-    bb: List[float] = []
-
-    for x in xs:
-        # Optional very soft shoulder near 1.0 to hide clipping
-        t = _smoothstep(1.0 - rolloff, 1.0, x)
-        shoulder = 1.0 - 0.07 * t  # gently pull highlights by up to 7%
+    x = _grid(n)
+    # Optional very soft shoulder near 1.0 to hide clipping (shared; beta scales a copy)
+    shoulder = _shoulder(n, rolloff)
+    if beta != 1.0:
+        shoulder = shoulder * beta
 
-        r = min(1.0, x * r_gain) * shoulder
-        g = min(1.0, x * g_gain) * shoulder
-        b = min(1.0, x * b_gain) * shoulder
+    tables = []
+    for gain in (r_gain, g_gain, b_gain):
+        arr, c = _new_farray(n)  # computed straight into the table's memory
+        np.multiply(x, gain, out=c)
+        np.minimum(c, 1.0, out=c)
+        c *= shoulder
+        _monotone_clip(c)
+        tables.append(arr)
 
-        if beta != 1.0:
-            r *= beta; g *= beta; b *= beta
+    return tables[0], tables[1], tables[2]
 
-        rr.append(r); gg.append(g); bb.append(b)
+# Built tables keyed on (kelvin, beta, n), rounded; reapply/reconfig and repeated
+# slider values re-push these instead of rebuilding
+_LUT_CACHE = _TableCache(8)
 
-    rr = _monotone_clip(rr)
-    gg = _monotone_clip(gg)
-    bb = _monotone_clip(bb)
+def _tint_tables(kelvin: float, beta: float, n: int) -> Tuple[array.array, array.array, array.array]:
+    key = (round(kelvin, 1), round(beta, 4), n)
+    tables = _LUT_CACHE.get(key)
+    if tables is None:
+        r_gain, g_gain, b_gain = _gains_at_mired(1e6 / key[0])
+        tables = _LUT_CACHE.put(key, _build_lut_color_tint(n, r_gain, g_gain, b_gain, beta=key[1]))
+    return tables
 
-    return array.array("f", rr), array.array("f", gg), array.array("f", bb)
+def _close_to_current(kelvin: float, beta: float, n: int) -> bool:
+    """
+    True if these settings are visually identical (< 5 K, < 0.002 beta) to the tables
+    on screen. Checked against lut's last-pushed fingerprint rather than CURRENT, since
+    lut and composer also write (and restore) the gamma tables.
+    """
+    last = _last_applied()
+    if last is None or last[0][0] != "warmth" or last[1] != tuple(_active_displays()):
+        return False
+    _, k0, beta0, n0 = last[0]
+    return n0 == n and abs(kelvin - k0) < 5.0 and abs(beta - beta0) < 2e-3
 
 # --------------------------------------------------------------------
 # Public API
 # --------------------------------------------------------------------
+# Slider-driven set_warmth calls are coalesced like lut's pushes: a call only puts
+# its arguments into a single slot (a newer call replaces whatever is still
+# waiting), and one persistent worker thread applies the newest, then waits
+# _DEBOUNCE_S before taking the next (last write wins). _lock is held by every
+# apply/restore; the direct ones (set_warmth_now, set_kelvin, disable) bump
+# _generation so a slider value queued before them can't land after them.
+_DEBOUNCE_S = 0.016
+_requests: "queue.Queue[Tuple[int, tuple]]" = queue.Queue(maxsize=1)
+_worker: Optional[threading.Thread] = None
+_generation = 0
+_slot_lock = threading.Lock()  # guards the slot swap, worker start and _generation
+_lock = threading.Lock()       # held while warmth tables are applied or colors restored
+
+def _worker_loop() -> None:
+    while True:
+        gen, args = _requests.get()
+        with _lock:
+            if gen == _generation:
+                # log and drop a failed apply: the worker must outlive it
+                try:
+                    _apply_warmth(*args)
+                except Exception as e:
+                    _log("Warmth apply failed:", args, repr(e))
+        time.sleep(_DEBOUNCE_S)
+
 def set_warmth(
     strength: float,
     *,
@@ -174,10 +280,49 @@ def set_warmth(
     strength ∈ [0,1]: 0 → neutral (≈6500K), 1 → very warm (≈1900K).
     beta_curve: when True, apply a gentle global dim as it gets very warm
                 (closer to f.lux feel at night).
+    Applied asynchronously on the warmth worker, at most once per _DEBOUNCE_S with
+    the latest values; set_warmth_now applies on the calling thread.
     """
-    s_user = 0.0 if strength < 0.0 else 1.0 if strength > 1.0 else float(strength)
+    global _worker
+    with _slot_lock:
+        try:
+            _requests.get_nowait()
+        except queue.Empty:
+            pass
+        _requests.put_nowait((_generation, (strength, n, kelvin_min, kelvin_max, beta_curve)))
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name="smartdim-warmth", daemon=True)
+            _worker.start()
+
+def set_warmth_now(
+    strength: float,
+    *,
+    n: int = 512,
+    kelvin_min: float = 1900.0,
+    kelvin_max: float = 6500.0,
+    beta_curve: bool = True
+) -> None:
+    """Synchronous set_warmth: applies on the calling thread, dropping any queued slider value."""
+    with _lock:
+        _cancel_pending()
+        _apply_warmth(strength, n, kelvin_min, kelvin_max, beta_curve)
+
+def _cancel_pending() -> None:
+    """Drop slider values queued or in flight on the worker (caller holds _lock)."""
+    global _generation
+    with _slot_lock:
+        _generation += 1
+        try:
+            _requests.get_nowait()
+        except queue.Empty:
+            pass
+
+def _apply_warmth(
+    strength: float, n: int, kelvin_min: float, kelvin_max: float, beta_curve: bool
+) -> None:
+    s_user = max(0.0, min(1.0, float(strength)))
     if s_user <= 1e-3:
-        CGDisplayRestoreColorSyncSettings()
+        _restore_system_colors()
         CURRENT.update({"enabled": False})
         _log("Warmth 0 → restored system colors")
         return
@@ -201,36 +346,43 @@ def set_warmth(
     else:
         beta = 1.0
 
-    r_gain, g_gain, b_gain = _kelvin_to_gains(kelvin, preserve_peak=True)
-    r, g, b = _build_lut_color_tint(n, r_gain, g_gain, b_gain, beta=beta)
+    if _close_to_current(kelvin, beta, n):
+        return
+
+    r, g, b = _tint_tables(kelvin, beta, n)
 
-    if _apply_rgb_tables(r, g, b):
+    if _apply_rgb_tables(r, g, b, kelvin, beta, n):
         CURRENT.update({"enabled": True, "kelvin": kelvin, "beta": beta, "n": n})
-        _log(f"Applied warmth: strength={s_user:.3f} remap={s:.3f} → {kelvin:.0f}K, "
-             f"gains=({r_gain:.3f},{g_gain:.3f},{b_gain:.3f}), beta={beta:.3f}, n={n}")
+        if LOG:  # the gains and the f-string are only needed for the log line
+            r_gain, g_gain, b_gain = _gains_at_mired(1e6 / round(kelvin, 1))
+            _log(f"Applied warmth: strength={s_user:.3f} remap={s:.3f} → {kelvin:.0f}K, "
+                 f"gains=({r_gain:.3f},{g_gain:.3f},{b_gain:.3f}), beta={beta:.3f}, n={n}")
     else:
         _log("No active displays — warmth LUT not applied")
 
 def disable() -> None:
-    CURRENT["enabled"] = False
-    CGDisplayRestoreColorSyncSettings()
+    with _lock:
+        _cancel_pending()
+        CURRENT["enabled"] = False
+        _restore_system_colors()
     _log("Disabled (restored original colors)")
 
 def reapply_if_enabled(*_args) -> None:
-    if not CURRENT.get("enabled", False):
-        return
-    k = CURRENT.get("kelvin", 6500.0)
-    beta = CURRENT.get("beta", 1.0)
-    n = CURRENT.get("n", 512)
-    r_gain, g_gain, b_gain = _kelvin_to_gains(k, preserve_peak=True)
-    r, g, b = _build_lut_color_tint(n, r_gain, g_gain, b_gain, beta=beta)
-    if _apply_rgb_tables(r, g, b):
-        _log(f"Reapplied warmth at {k:.0f}K, beta={beta:.3f}")
+    with _lock:
+        if not CURRENT.get("enabled", False):
+            return
+        k = CURRENT.get("kelvin", 6500.0)
+        beta = CURRENT.get("beta", 1.0)
+        n = CURRENT.get("n", 512)
+        r, g, b = _tint_tables(k, beta, n)
+        if _apply_rgb_tables(r, g, b, k, beta, n) and LOG:
+            _log(f"Reapplied warmth at {k:.0f}K, beta={beta:.3f}")
 
 # --------------------------------------------------------------------
 # Display change callbacks
 # --------------------------------------------------------------------
 def _display_reconfig_callback(display, flags, userInfo) -> None:
+    _forget_display_state()  # lut's callback may not be registered (or may run after this one)
     _log("Display reconfig:", display, flags)
     reapply_if_enabled()
 
@@ -247,10 +399,14 @@ def unregister_display_callbacks():
 # --------------------------------------------------------------------
 def set_kelvin(kelvin: float, *, n: int = 512, beta: float = 1.0) -> None:
     k = max(1000.0, min(6500.0 if kelvin >= 6500 else 10000.0, kelvin))
-    r_gain, g_gain, b_gain = _kelvin_to_gains(k, preserve_peak=True)
-    r, g, b = _build_lut_color_tint(n, r_gain, g_gain, b_gain, beta=beta)
-    if _apply_rgb_tables(r, g, b):
-        CURRENT.update({"enabled": True, "kelvin": k, "beta": beta, "n": n})
-        _log(f"Applied kelvin={k:.0f}, beta={beta:.3f}, n={n}")
-    else:
-        _log("No active displays — kelvin LUT not applied")
+    with _lock:
+        _cancel_pending()  # this call is newer than any slider value still waiting
+        if _close_to_current(k, beta, n):
+            return
+        r, g, b = _tint_tables(k, beta, n)
+        if _apply_rgb_tables(r, g, b, k, beta, n):
+            CURRENT.update({"enabled": True, "kelvin": k, "beta": beta, "n": n})
+            if LOG:
+                _log(f"Applied kelvin={k:.0f}, beta={beta:.3f}, n={n}")
+        else:
+            _log("No active displays — kelvin LUT not applied")